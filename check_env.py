@@ -2,34 +2,44 @@
 Simple script to check if environment variables are loading correctly
 """
 
+import argparse
+import logging
 import os
-from dotenv import load_dotenv
+import sys
+from env_cache import ensure_loaded
 
-print("🔍 Checking environment variable setup...\n")
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--verbose", action="store_true", help="show debug output")
+args = parser.parse_args()
+logging.basicConfig(stream=sys.stdout, level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+logger.info("🔍 Checking environment variable setup...\n")
 
 # Try loading from different .env files
 env_files = ['.env', '.env.local', '.env.production']
 
 for env_file in env_files:
     if os.path.exists(env_file):
-        print(f"✅ Found {env_file}")
-        load_dotenv(env_file)
+        logger.info("✅ Found %s", env_file)
+        ensure_loaded(env_file)
     else:
-        print(f"❌ {env_file} not found")
+        logger.info("❌ %s not found", env_file)
 
-print(f"\n📋 Environment Variables:")
-print(f"DATABASE_URL: {os.getenv('DATABASE_URL', 'NOT SET')}")
-print(f"SECRET_KEY: {'SET' if os.getenv('SECRET_KEY') else 'NOT SET'}")
-print(f"VERCEL: {os.getenv('VERCEL', 'NOT SET')}")
+logger.info("\n📋 Environment Variables:")
+logger.info("DATABASE_URL: %s", 'SET' if os.getenv('DATABASE_URL') else 'NOT SET')
+logger.debug("DATABASE_URL value: %s", os.getenv('DATABASE_URL', 'NOT SET'))
+logger.info("SECRET_KEY: %s", 'SET' if os.getenv('SECRET_KEY') else 'NOT SET')
+logger.info("VERCEL: %s", os.getenv('VERCEL', 'NOT SET'))
 
 # Check if DATABASE_URL is PostgreSQL
 db_url = os.getenv('DATABASE_URL', '')
 if db_url.startswith('postgresql'):
-    print(f"\n✅ DATABASE_URL is correctly set to PostgreSQL")
-    print(f"🔗 Host: {db_url.split('@')[1].split(':')[0] if '@' in db_url else 'Unknown'}")
+    logger.info("\n✅ DATABASE_URL is correctly set to PostgreSQL")
+    logger.info("🔗 Host: %s", db_url.split('@')[1].split(':')[0] if '@' in db_url else 'Unknown')
 elif db_url.startswith('sqlite'):
-    print(f"\n❌ DATABASE_URL is set to SQLite instead of PostgreSQL")
+    logger.info("\n❌ DATABASE_URL is set to SQLite instead of PostgreSQL")
 else:
-    print(f"\n❌ DATABASE_URL format is unrecognized or not set")
+    logger.info("\n❌ DATABASE_URL format is unrecognized or not set")
 
-print(f"\n🎯 Current working directory: {os.getcwd()}")
\ No newline at end of file
+logger.info("\n🎯 Current working directory: %s", os.getcwd())
\ No newline at end of file
@@ -1,24 +1,57 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
-# Use environment variable for database URL in production
+# Use environment variable for database URL in production.
+# On Vercel this should point at the PgBouncer (transaction pooling) port.
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+IS_VERCEL = os.getenv("VERCEL") == "1"
+
+# Compiled SQL statements kept per engine (SQLAlchemy default is 500)
+QUERY_CACHE_SIZE = 1200
+
 if not DATABASE_URL:
     # Fallback to SQLite for local development
     DATABASE_URL = "sqlite:///./notes.db"
 
-# Configure engine based on database type
+# Configure engine based on database type.
+# `insert` is the dialect's INSERT construct, which supports ON CONFLICT.
 if DATABASE_URL.startswith("postgresql"):
+    from sqlalchemy.dialects.postgresql import insert
+else:
+    from sqlalchemy.dialects.sqlite import insert
+
+if DATABASE_URL.startswith("postgresql") and IS_VERCEL:
+    # Serverless: keep one connection for warm invocations and let PgBouncer
+    # multiplex instances; overflow covers concurrent requests in one instance
+    # (Fluid compute) instead of queueing them behind that connection
+    engine = create_engine(
+        DATABASE_URL,
+        query_cache_size=QUERY_CACHE_SIZE,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=1,
+        max_overflow=4,
+        pool_timeout=10,
+        connect_args={
+            "sslmode": "require",
+            "connect_timeout": 30
+        }
+    )
+elif DATABASE_URL.startswith("postgresql"):
     # PostgreSQL configuration for production
     engine = create_engine(
         DATABASE_URL,
+        query_cache_size=QUERY_CACHE_SIZE,
         pool_pre_ping=True,
         pool_recycle=300,
-        pool_size=5,
-        max_overflow=10,
+        pool_size=20,
+        max_overflow=40,
+        pool_timeout=10,
         connect_args={
             "sslmode": "require",
             "connect_timeout": 30
@@ -28,10 +61,39 @@ else:
     # SQLite configuration for local development
     engine = create_engine(
         DATABASE_URL, 
+        query_cache_size=QUERY_CACHE_SIZE,
         connect_args={"check_same_thread": False},
         pool_pre_ping=True
     )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the unauthenticated read routes, on the same database.
+# psycopg 3 takes the same libpq connect args as psycopg2; prepare_threshold=None
+# keeps it off server-side prepared statements, which PgBouncer's transaction
+# pooling cannot track across backends.
+if DATABASE_URL.startswith("postgresql"):
+    async_engine = create_async_engine(
+        make_url(DATABASE_URL).set(drivername="postgresql+psycopg"),
+        query_cache_size=QUERY_CACHE_SIZE,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=1 if IS_VERCEL else 20,
+        max_overflow=4 if IS_VERCEL else 40,
+        pool_timeout=10,
+        connect_args={
+            "sslmode": "require",
+            "connect_timeout": 30,
+            "prepare_threshold": None
+        }
+    )
+else:
+    async_engine = create_async_engine(
+        make_url(DATABASE_URL).set(drivername="sqlite+aiosqlite"),
+        query_cache_size=QUERY_CACHE_SIZE,
+        pool_pre_ping=True
+    )
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
 Base = declarative_base()
\ No newline at end of file
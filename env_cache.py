@@ -0,0 +1,38 @@
+"""
+Load .env files into the process environment once
+Each file is parsed at most once per process; variables already set in the environment win
+"""
+
+import os
+from functools import lru_cache
+from dotenv import dotenv_values
+
+_LOADED = set()
+
+@lru_cache(maxsize=None)
+def _default_env_file():
+    # Like load_dotenv(): the nearest .env walking up from the app directory,
+    # wherever the process was started from
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(directory, '.env')
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+def ensure_loaded(*env_files):
+    """Parse each env file (default: the nearest .env above the app) once and fill in unset environment variables"""
+    for env_file in env_files or (_default_env_file(),):
+        if not env_file:
+            continue
+        path = os.path.abspath(env_file)
+        if path in _LOADED:
+            continue
+        _LOADED.add(path)
+
+        for key, value in dotenv_values(path).items():
+            if value is not None:
+                os.environ.setdefault(key, value)
@@ -3,19 +3,18 @@ Database initialization script for PostgreSQL
 Run this script to create the required tables in your Aiven PostgreSQL database
 """
 
+import argparse
+import logging
 import os
 import sys
-from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from env_cache import ensure_loaded
+from sqlalchemy import text
 
-# Load environment variables from .env.local first, then .env
-load_dotenv('.env.local')
-load_dotenv('.env')
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-print(f"🔧 Environment files loaded")
-print(f"📍 DATABASE_URL set: {'Yes' if os.getenv('DATABASE_URL') else 'No'}")
+# Load environment variables from .env.local first, then .env, then the app's .env
+ensure_loaded('.env.local', '.env')
+ensure_loaded()
 
 # Add the parent directory to the path to import our models
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -26,36 +25,42 @@ from models import User, Note
 def init_database():
     """Initialize the database with required tables"""
     try:
-        print("Creating database tables...")
-        
-        # Import after environment variables are loaded
-        from database import Base, engine
-        from models import User, Note
+        logger.info("Creating database tables...")
         
         # Check if we're using PostgreSQL
         db_url = os.getenv('DATABASE_URL', 'Not set')
         if not db_url.startswith('postgresql'):
-            print(f"❌ DATABASE_URL is not set to PostgreSQL!")
-            print(f"Current URL: {db_url}")
+            logger.error("❌ DATABASE_URL is not set to PostgreSQL!")
+            logger.error("Current URL: %s", db_url)
             return False
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
         
-        print("✅ Database tables created successfully!")
-        print("Tables created: users, notes")
+        # create_all skips existing tables, so add any indexes they are missing
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+        
+        # Tables created before timestamps moved to the database need the defaults added
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE notes ALTER COLUMN created_at SET DEFAULT timezone('UTC', now())"))
+            connection.execute(text("ALTER TABLE notes ALTER COLUMN updated_at SET DEFAULT timezone('UTC', now())"))
+        
+        logger.info("✅ Database tables created successfully!")
+        logger.info("Tables created: users, notes")
         
         # Test connection
         with engine.connect() as connection:
             result = connection.execute(text("SELECT version();"))
             version = result.fetchone()[0]
-            print(f"✅ Connected to PostgreSQL: {version}")
+            logger.info("✅ Connected to PostgreSQL: %s", version)
             
         return True
             
     except Exception as e:
-        print(f"❌ Error initializing database: {e}")
-        print("💡 Make sure DATABASE_URL is set correctly in .env file")
+        logger.error("❌ Error initializing database: %s", e)
+        logger.error("💡 Make sure DATABASE_URL is set correctly in .env file")
         return False
 
 def check_tables():
@@ -70,34 +75,46 @@ def check_tables():
             """))
             tables = [row[0] for row in result.fetchall()]
             
-            print(f"📋 Existing tables: {', '.join(tables) if tables else 'None'}")
+            logger.info("📋 Existing tables: %s", ', '.join(tables) if tables else 'None')
+            
+            # Column listings are only useful when debugging the schema
+            if not logger.isEnabledFor(logging.DEBUG):
+                return
             
             for table in tables:
-                print(f"\n🔍 Structure of table '{table}':")
-                result = connection.execute(text(f"""
+                logger.debug("\n🔍 Structure of table '%s':", table)
+                result = connection.execute(text("""
                     SELECT column_name, data_type, is_nullable 
                     FROM information_schema.columns 
-                    WHERE table_name = '{table}' 
+                    WHERE table_name = :table 
                     ORDER BY ordinal_position
-                """))
+                """), {"table": table})
                 
                 for row in result.fetchall():
                     nullable = "NULL" if row[2] == "YES" else "NOT NULL"
-                    print(f"  - {row[0]}: {row[1]} ({nullable})")
+                    logger.debug("  - %s: %s (%s)", row[0], row[1], nullable)
                     
     except Exception as e:
-        print(f"❌ Error checking tables: {e}")
+        logger.error("❌ Error checking tables: %s", e)
 
 if __name__ == "__main__":
-    print("🚀 Initializing PostgreSQL database for Notes App...")
-    print(f"📍 Database URL: {os.getenv('DATABASE_URL', 'Not set')[:50]}{'...' if len(os.getenv('DATABASE_URL', '')) > 50 else ''}")
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbose", action="store_true", help="show debug output")
+    args = parser.parse_args()
+    logging.basicConfig(stream=sys.stdout, level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    
+    logger.info("🔧 Environment files loaded")
+    logger.info("📍 DATABASE_URL set: %s", 'Yes' if os.getenv('DATABASE_URL') else 'No')
+    logger.info("🚀 Initializing PostgreSQL database for Notes App...")
+    db_url = os.getenv('DATABASE_URL', 'Not set')
+    logger.debug("📍 Database URL: %s%s", db_url[:50], '...' if len(db_url) > 50 else '')
     
     success = init_database()
     if success:
         check_tables()
-        print("\n✅ Database initialization completed!")
-        print("You can now deploy your app to Vercel.")
+        logger.info("\n✅ Database initialization completed!")
+        logger.info("You can now deploy your app to Vercel.")
     else:
-        print("\n❌ Database initialization failed!")
-        print("Please check your DATABASE_URL and try again.")
+        logger.error("\n❌ Database initialization failed!")
+        logger.error("Please check your DATABASE_URL and try again.")
         sys.exit(1)
\ No newline at end of file
@@ -1,21 +1,28 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import bindparam, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from pydantic import TypeAdapter
 from mangum import Mangum
 import os
+import logging
+import hashlib
+import orjson
+import time
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+import jwt
 from passlib.context import CryptContext
-from dotenv import load_dotenv
 
 # Load environment variables
-load_dotenv()
+from env_cache import ensure_loaded
+ensure_loaded()
 
-from database import SessionLocal, engine, Base
+from database import SessionLocal, AsyncSessionLocal, engine, Base, insert
+from cache import TTLCache
 from models import User, Note
 from schemas import (
     UserCreate, UserResponse, NoteCreate, NoteResponse, 
@@ -23,15 +30,19 @@ from schemas import (
     PublicNoteResponse
 )
 
+logger = logging.getLogger(__name__)
+
 # Check if running on Vercel
 IS_VERCEL = os.getenv("VERCEL") == "1"
 
-# Initialize database tables safely
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    # Log error but don't crash the application
-    print(f"Database initialization warning: {e}")
+# Create tables only when explicitly requested for local development.
+# Production schemas are created once at deploy time with init_db.py.
+if not IS_VERCEL and os.getenv("INIT_DB") == "1":
+    try:
+        Base.metadata.create_all(bind=engine)
+    except Exception as e:
+        # Log error but don't crash the application
+        logger.warning("Database initialization warning: %s", e)
 
 # Create FastAPI app with conditional configuration for Vercel
 try:
@@ -41,7 +52,7 @@ try:
         root_path="/api" if IS_VERCEL else ""
     )
 except Exception as e:
-    print(f"FastAPI initialization error: {e}")
+    logger.error("FastAPI initialization error: %s", e)
     # Create a minimal app as fallback
     app = FastAPI(title="Notes API")
 
@@ -50,46 +61,80 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
+# Signing key is encoded once instead of on every encode/decode
+_JWT_KEY = SECRET_KEY.encode()
+
+# Decoded tokens (token -> username), each kept no longer than its own expiry
+_token_cache = TTLCache(maxsize=1024)
+
+# argon2id for new hashes; existing bcrypt hashes still verify and are upgraded on login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
+    bcrypt__rounds=12,
+)
+
+# Recent password verification results, so repeat logins skip hashing.
+# Failures are only remembered briefly to limit their use as an oracle.
+VERIFY_SUCCESS_TTL_SECONDS = 60
+VERIFY_FAILURE_TTL_SECONDS = 5
+_verify_cache = TTLCache(maxsize=1024)
 security = HTTPBearer()
 
 # CORS middleware with error handling
 try:
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=[
+        allow_origins=frozenset([
             "https://namekart-frontend-w3gv.vercel.app",
-            "https://*.vercel.app",  # Allow all Vercel app domains
             "http://localhost:5173",
             "http://localhost:3000", 
             "http://localhost:5174",
             "http://127.0.0.1:5173",
             "http://127.0.0.1:3000"
-        ],
+        ]),
+        allow_origin_regex=r"https://[a-z0-9-]+\.vercel\.app",  # Allow all Vercel app domains
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         allow_headers=["*"],
     )
 except Exception as e:
-    print(f"CORS middleware setup error: {e}")
+    logger.error("CORS middleware setup error: %s", e)
 
 # Global exception handler for better error reporting
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    print(f"Global exception: {exc}")
+    logger.error("Unhandled exception", exc_info=exc)
     return JSONResponse(
         status_code=500,
-        content={"detail": "Internal server error", "error": str(exc)}
+        content={"detail": "Internal server error"}
     )
 
+# Hot queries, built once so each request reuses the same compiled SQL
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+NOTES_BY_OWNER = (
+    select(Note)
+    .where(Note.owner_id == bindparam("owner_id"))
+    .order_by(Note.id)
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+
 # Database dependency with error handling
 def get_db():
     db = None
     try:
         db = SessionLocal()
         yield db
+    except HTTPException:
+        # The route's own 4xx answers pass through unchanged
+        raise
     except Exception as e:
-        print(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
         if db:
             db.rollback()
         raise HTTPException(status_code=503, detail="Database connection failed")
@@ -97,9 +142,33 @@ def get_db():
         if db:
             db.close()
 
+# Async database dependency for the read routes that need no authenticated user
+async def get_async_db():
+    db = None
+    try:
+        db = AsyncSessionLocal()
+        yield db
+    except HTTPException:
+        # The route's own 4xx answers pass through unchanged
+        raise
+    except Exception as e:
+        logger.error("Database connection error: %s", e)
+        if db:
+            await db.rollback()
+        raise HTTPException(status_code=503, detail="Database connection failed")
+    finally:
+        if db:
+            await db.close()
+
 # Auth helper functions
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    cache_key = (hashed_password, hashlib.sha256(plain_password.encode()).hexdigest())
+    verified = _verify_cache.get(cache_key)
+    if verified is None:
+        verified = pwd_context.verify(plain_password, hashed_password)
+        ttl = VERIFY_SUCCESS_TTL_SECONDS if verified else VERIFY_FAILURE_TTL_SECONDS
+        _verify_cache.set(cache_key, verified, ttl)
+    return verified
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -111,7 +180,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
@@ -120,77 +189,91 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    token = credentials.credentials
+    username = _token_cache.get(token)
+    if username is None:
+        try:
+            payload = jwt.decode(
+                token, _JWT_KEY, algorithms=[ALGORITHM],
+                options={"require": ["exp", "sub"]}
+            )
+        except jwt.InvalidTokenError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        username = payload["sub"]
+        _token_cache.set(token, username, payload["exp"] - time.time())
     
-    user = db.query(User).filter(User.username == username).first()
+    user = db.execute(USER_BY_USERNAME, {"username": username}).scalar_one_or_none()
     if user is None:
         raise credentials_exception
     return user
 
+# Static parts of the root and health payloads, serialized once with the
+# closing brace trimmed so only the timestamp is encoded per request
+_ROOT_BODY_PREFIX = orjson.dumps({
+    "message": "Namekart Backend is running",
+    "status": "active",
+    "api": "Notes API",
+    "version": "1.0.0",
+    "environment": "Vercel" if IS_VERCEL else "Local",
+    "api_prefix": "/api" if IS_VERCEL else "",
+})[:-1]
+_HEALTH_BODY_PREFIX = orjson.dumps({
+    "status": "healthy",
+    "environment": "Vercel" if IS_VERCEL else "Local",
+})[:-1]
+
+def _with_timestamp(body_prefix):
+    return Response(
+        content=body_prefix + b',"timestamp":"' + datetime.utcnow().isoformat().encode() + b'"}',
+        media_type="application/json"
+    )
+
 # Routes
 @app.get("/")
-def read_root():
-    try:
-        return {
-            "message": "Namekart Backend is running",
-            "status": "active",
-            "api": "Notes API",
-            "version": "1.0.0",
-            "environment": "Vercel" if IS_VERCEL else "Local",
-            "api_prefix": "/api" if IS_VERCEL else "",
-            "timestamp": datetime.utcnow().isoformat()
-        }
-    except Exception as e:
-        return {
-            "message": "Namekart Backend - Basic Mode",
-            "status": "active",
-            "error": str(e)
-        }
+async def read_root():
+    return _with_timestamp(_ROOT_BODY_PREFIX)
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint for monitoring"""
-    return {
-        "status": "healthy",
-        "environment": "Vercel" if IS_VERCEL else "Local",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return _with_timestamp(_HEALTH_BODY_PREFIX)
 
 @app.post("/auth/register", response_model=UserResponse)
 def register(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if user exists
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    
-    # Create new user
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password
+    # Insert the user in one round trip; an existing username inserts nothing
+    stmt = (
+        insert(User)
+        .values(
+            username=user.username,
+            email=user.email,
+            hashed_password=get_password_hash(user.password)
+        )
+        .on_conflict_do_nothing(index_elements=["username"])
+        .returning(User.id)
     )
-    db.add(db_user)
+    user_id = db.execute(stmt).scalar_one_or_none()
+    if user_id is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Username already registered")
     db.commit()
-    db.refresh(db_user)
     
-    return UserResponse(id=db_user.id, username=db_user.username, email=db_user.email)
+    return UserResponse(id=user_id, username=user.username, email=user.email)
 
 @app.post("/auth/login", response_model=Token)
 def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = db.execute(USER_BY_USERNAME, {"username": login_data.username}).scalar_one_or_none()
     if not user or not verify_password(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    # Rehash legacy bcrypt passwords with the current scheme
+    if pwd_context.needs_update(user.hashed_password):
+        user.hashed_password = get_password_hash(login_data.password)
+        db.commit()
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -203,18 +286,21 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
     return UserResponse(id=current_user.id, username=current_user.username, email=current_user.email)
 
 @app.get("/notes", response_model=List[NoteResponse])
-def get_user_notes(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    notes = db.query(Note).filter(Note.owner_id == current_user.id).all()
-    return notes
+def get_user_notes(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    params = {"owner_id": current_user.id, "limit": limit, "offset": offset}
+    return db.execute(NOTES_BY_OWNER, params).scalars().all()
 
 @app.post("/notes", response_model=NoteResponse)
 def create_note(note: NoteCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     db_note = Note(
         title=note.title,
         content=note.content,
-        owner_id=current_user.id,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        owner_id=current_user.id
     )
     db.add(db_note)
     db.commit()
@@ -223,8 +309,8 @@ def create_note(note: NoteCreate, current_user: User = Depends(get_current_user)
 
 @app.get("/notes/{note_id}", response_model=NoteResponse)
 def get_note(note_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    note = db.query(Note).filter(Note.id == note_id).first()
-    if not note:
+    note = db.get(Note, note_id)
+    if note is None:
         raise HTTPException(status_code=404, detail="Note not found")
     
     # Check if user owns the note or if it's shared
@@ -235,8 +321,8 @@ def get_note(note_id: int, current_user: User = Depends(get_current_user), db: S
 
 @app.put("/notes/{note_id}", response_model=NoteResponse)
 def update_note(note_id: int, note_update: NoteUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    note = db.query(Note).filter(Note.id == note_id, Note.owner_id == current_user.id).first()
-    if not note:
+    note = db.get(Note, note_id)
+    if note is None or note.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Note not found")
     
     if note_update.title is not None:
@@ -244,71 +330,106 @@ def update_note(note_id: int, note_update: NoteUpdate, current_user: User = Depe
     if note_update.content is not None:
         note.content = note_update.content
     
-    note.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(note)
+    _public_notes_cache.clear()
     return note
 
 @app.delete("/notes/{note_id}")
 def delete_note(note_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    note = db.query(Note).filter(Note.id == note_id, Note.owner_id == current_user.id).first()
-    if not note:
+    note = db.get(Note, note_id)
+    if note is None or note.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Note not found")
     
     db.delete(note)
     db.commit()
+    _public_notes_cache.clear()
     return {"message": "Note deleted successfully"}
 
 @app.post("/notes/{note_id}/share")
 def share_note(note_id: int, share_request: ShareNoteRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    note = db.query(Note).filter(Note.id == note_id, Note.owner_id == current_user.id).first()
-    if not note:
+    note = db.get(Note, note_id)
+    if note is None or note.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Note not found")
     
     note.is_public = share_request.is_public
-    note.updated_at = datetime.utcnow()
     db.commit()
+    _public_notes_cache.clear()
     
     share_url = f"/shared/{note.id}" if share_request.is_public else None
     return {"message": "Note sharing updated", "share_url": share_url, "is_public": note.is_public}
 
+# Public note rows with the owner's username, selected as plain columns
+PUBLIC_NOTE_SELECT = (
+    select(
+        Note.id,
+        Note.title,
+        Note.content,
+        Note.created_at,
+        Note.updated_at,
+        Note.is_public,
+        Note.owner_id,
+        User.username.label("owner_username"),
+    )
+    .join(User, Note.owner_id == User.id)
+    .where(Note.is_public.is_(True))
+)
+PUBLIC_NOTE_BY_ID = PUBLIC_NOTE_SELECT.where(Note.id == bindparam("note_id"))
+
+# Serialized /public-notes pages, shared by all anonymous visitors of a warm worker
+PUBLIC_NOTES_CACHE_TTL_SECONDS = 15
+_public_notes_cache = TTLCache(maxsize=256)
+_public_notes_adapter = TypeAdapter(List[PublicNoteResponse])
+
+def _etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
 @app.get("/public-notes", response_model=List[PublicNoteResponse])
-def get_public_notes(db: Session = Depends(get_db)):
-    """Get all public notes from all users with owner information"""
-    notes = db.query(Note, User.username).join(User, Note.owner_id == User.id).filter(Note.is_public == True).order_by(Note.updated_at.desc()).all()
+async def get_public_notes(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    before: Optional[datetime] = Query(None, description="Keyset cursor: updated_at of the last note seen"),
+    before_id: Optional[int] = Query(None, description="Keyset cursor: id of the last note seen"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get public notes from all users with owner information, newest first"""
+    if (before is None) != (before_id is None):
+        raise HTTPException(status_code=400, detail="before and before_id must be given together")
     
-    result = []
-    for note, owner_username in notes:
-        result.append(PublicNoteResponse(
-            id=note.id,
-            title=note.title,
-            content=note.content,
-            created_at=note.created_at,
-            updated_at=note.updated_at,
-            is_public=note.is_public,
-            owner_id=note.owner_id,
-            owner_username=owner_username
-        ))
+    cache_key = (limit, offset, before, before_id)
+    cached = _public_notes_cache.get(cache_key)
+    if cached is None:
+        stmt = PUBLIC_NOTE_SELECT
+        if before is not None:
+            stmt = stmt.where(tuple_(Note.updated_at, Note.id) < tuple_(before, before_id))
+        # id breaks updated_at ties so pages are stable and the cursor skips nothing
+        stmt = stmt.order_by(Note.updated_at.desc(), Note.id.desc()).limit(limit).offset(offset)
+        # Iterate the result directly instead of copying it with .all(); psycopg2
+        # still buffers the whole page client-side, which the limit keeps small
+        result = (await db.execute(stmt)).mappings()
+        body = _public_notes_adapter.dump_json([PublicNoteResponse(**row) for row in result])
+        cached = (body, f'"{hashlib.md5(body).hexdigest()}"')
+        _public_notes_cache.set(cache_key, cached, PUBLIC_NOTES_CACHE_TTL_SECONDS)
     
-    return result
+    body, etag = cached
+    # no-cache: clients may keep the page but must revalidate it, so edits show up at once
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.get("/shared/{note_id}", response_model=PublicNoteResponse)
-def get_shared_note(note_id: int, db: Session = Depends(get_db)):
-    note_with_author = db.query(Note, User.username).join(User, Note.owner_id == User.id).filter(Note.id == note_id, Note.is_public == True).first()
-    if not note_with_author:
+async def get_shared_note(note_id: int, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(PUBLIC_NOTE_BY_ID, {"note_id": note_id})).mappings().first()
+    if not row:
         raise HTTPException(status_code=404, detail="Shared note not found")
     
-    note, owner_username = note_with_author
-    return PublicNoteResponse(
-        id=note.id,
-        title=note.title,
-        content=note.content,
-        created_at=note.created_at,
-        updated_at=note.updated_at,
-        is_public=note.is_public,
-        owner_id=note.owner_id,
-        owner_username=owner_username
-    )
+    return PublicNoteResponse(**row)
 
 # Create Mangum handler for Vercel serverless deployment
 handler = Mangum(app, lifespan="off")
@@ -1,7 +1,25 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.expression import FunctionElement
 from database import Base
 
+class utcnow(FunctionElement):
+    """Current UTC time as a naive timestamp, evaluated by the database"""
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    # now() is session-local; timestamp columns have always held naive UTC
+    return "timezone('UTC', now())"
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    # UTC in the same text format SQLAlchemy's SQLite DateTime stores and binds;
+    # CURRENT_TIMESTAMP drops the microseconds and sorts wrong against cursors
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -19,10 +37,15 @@ class Note(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime, nullable=False)
-    updated_at = Column(DateTime, nullable=False)
+    # `default` puts the SQL expression into each INSERT, so tables created before
+    # the server defaults existed (e.g. the shipped notes.db) still get timestamps
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow(), nullable=False)
+    updated_at = Column(DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow(), nullable=False)
     is_public = Column(Boolean, default=False)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Relationship
-    owner = relationship("User", back_populates="notes")
\ No newline at end of file
+    owner = relationship("User", back_populates="notes")
+
+# Serves the public feed: WHERE is_public ORDER BY updated_at DESC
+Index("ix_notes_public_updated", Note.is_public, Note.updated_at.desc())
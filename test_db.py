@@ -3,18 +3,17 @@ Test script to verify PostgreSQL connection
 Run this before deploying to ensure everything works
 """
 
+import argparse
+import logging
 import os
 import sys
-from dotenv import load_dotenv
-from datetime import datetime
+from env_cache import ensure_loaded
 
-# Load environment variables from .env.local first, then .env
-load_dotenv('.env.local')
-load_dotenv('.env')
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-print(f"🔧 Environment files loaded")
-print(f"📍 DATABASE_URL set: {'Yes' if os.getenv('DATABASE_URL') else 'No'}")
+# Load environment variables from .env.local first, then .env, then the app's .env
+ensure_loaded('.env.local', '.env')
+ensure_loaded()
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -26,37 +25,37 @@ def test_connection():
         from database import engine
         from sqlalchemy import text
         
-        print("🔍 Testing PostgreSQL connection...")
+        logger.info("🔍 Testing PostgreSQL connection...")
         db_url = os.getenv('DATABASE_URL', 'Not set')
-        print(f"📍 Database URL: {db_url[:50]}{'...' if len(db_url) > 50 else ''}")
+        logger.debug("📍 Database URL: %s%s", db_url[:50], '...' if len(db_url) > 50 else '')
         
         if not db_url.startswith('postgresql'):
-            print("❌ DATABASE_URL is not set to PostgreSQL!")
-            print(f"Current URL: {db_url}")
+            logger.error("❌ DATABASE_URL is not set to PostgreSQL!")
+            logger.error("Current URL: %s", db_url)
             return False
         
         with engine.connect() as connection:
             # Test basic connection
             result = connection.execute(text("SELECT version();"))
             version = result.fetchone()[0]
-            print(f"✅ Connection successful!")
-            print(f"🐘 PostgreSQL version: {version}")
+            logger.info("✅ Connection successful!")
+            logger.info("🐘 PostgreSQL version: %s", version)
             
             # Test database name
             result = connection.execute(text("SELECT current_database();"))
             db_name = result.fetchone()[0]
-            print(f"📊 Connected to database: {db_name}")
+            logger.info("📊 Connected to database: %s", db_name)
             
             # Test SSL connection
             result = connection.execute(text("SHOW ssl;"))
             ssl_status = result.fetchone()[0]
-            print(f"🔒 SSL status: {ssl_status}")
+            logger.info("🔒 SSL status: %s", ssl_status)
             
             return True
             
     except Exception as e:
-        print(f"❌ Connection failed: {e}")
-        print("💡 Make sure DATABASE_URL is set correctly in .env file")
+        logger.error("❌ Connection failed: %s", e)
+        logger.error("💡 Make sure DATABASE_URL is set correctly in .env file")
         return False
 
 def test_crud_operations():
@@ -66,9 +65,9 @@ def test_crud_operations():
         from models import User, Note
         from passlib.context import CryptContext
         
-        print("\n🧪 Testing CRUD operations...")
+        logger.info("\n🧪 Testing CRUD operations...")
         
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
         db = SessionLocal()
         
         # Test user creation
@@ -90,40 +89,45 @@ def test_crud_operations():
         db.add(test_user)
         db.commit()
         db.refresh(test_user)
-        print(f"✅ Created test user: {test_user.username} (ID: {test_user.id})")
+        logger.info("✅ Created test user: %s (ID: %s)", test_user.username, test_user.id)
         
         # Test note creation
         test_note = Note(
             title="Test Note for Vercel",
             content="This is a test note to verify PostgreSQL connection works.",
-            owner_id=test_user.id,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            owner_id=test_user.id
         )
         db.add(test_note)
         db.commit()
         db.refresh(test_note)
-        print(f"✅ Created test note: {test_note.title} (ID: {test_note.id})")
+        logger.info("✅ Created test note: %s (ID: %s)", test_note.title, test_note.id)
         
         # Test reading
         notes = db.query(Note).filter(Note.owner_id == test_user.id).all()
-        print(f"✅ Retrieved {len(notes)} notes for user")
+        logger.info("✅ Retrieved %s notes for user", len(notes))
         
         # Clean up
         db.delete(test_note)
         db.delete(test_user)
         db.commit()
-        print("✅ Cleaned up test data")
+        logger.info("✅ Cleaned up test data")
         
         db.close()
         return True
         
     except Exception as e:
-        print(f"❌ CRUD test failed: {e}")
+        logger.error("❌ CRUD test failed: %s", e)
         return False
 
 if __name__ == "__main__":
-    print("🚀 Testing PostgreSQL setup for Vercel deployment...\n")
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbose", action="store_true", help="show debug output")
+    args = parser.parse_args()
+    logging.basicConfig(stream=sys.stdout, level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    
+    logger.info("🔧 Environment files loaded")
+    logger.info("📍 DATABASE_URL set: %s", 'Yes' if os.getenv('DATABASE_URL') else 'No')
+    logger.info("🚀 Testing PostgreSQL setup for Vercel deployment...\n")
     
     # Test connection
     connection_ok = test_connection()
@@ -133,14 +137,14 @@ if __name__ == "__main__":
         crud_ok = test_crud_operations()
         
         if crud_ok:
-            print("\n🎉 All tests passed! Your app is ready for Vercel deployment.")
-            print("\n📋 Next steps:")
-            print("1. Run: vercel --prod")
-            print("2. Set environment variables in Vercel dashboard:")
-            print("   - DATABASE_URL: your_postgresql_url")
-            print("   - SECRET_KEY: your_secure_secret_key")
-            print("   - VERCEL: true")
+            logger.info("\n🎉 All tests passed! Your app is ready for Vercel deployment.")
+            logger.info("\n📋 Next steps:")
+            logger.info("1. Run: vercel --prod")
+            logger.info("2. Set environment variables in Vercel dashboard:")
+            logger.info("   - DATABASE_URL: your_postgresql_url")
+            logger.info("   - SECRET_KEY: your_secure_secret_key")
+            logger.info("   - VERCEL: true")
         else:
-            print("\n❌ CRUD tests failed. Please check your database setup.")
+            logger.error("\n❌ CRUD tests failed. Please check your database setup.")
     else:
-        print("\n❌ Connection test failed. Please check your DATABASE_URL.")
\ No newline at end of file
+        logger.error("\n❌ Connection test failed. Please check your DATABASE_URL.")
\ No newline at end of file
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Regression test for /public-notes keyset pagination
+Pages through notes that share one updated_at and checks nothing repeats or is skipped
+"""
+
+import os
+import sys
+import tempfile
+
+# Use a throwaway SQLite database for this run
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test_public_notes.db')}"
+os.environ.pop("VERCEL", None)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from database import Base, SessionLocal, engine
+from models import User, Note
+from main import app
+
+def test_public_notes_pages_through_tied_timestamps():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(username="pager", email="pager@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        # One multi-row INSERT, so every note gets the same default updated_at
+        db.execute(insert(Note).values([
+            {"title": f"Note {i}", "content": "...", "is_public": True, "owner_id": user.id}
+            for i in range(1, 6)
+        ]))
+        db.commit()
+
+    client = TestClient(app)
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/public-notes", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        if not page:
+            break
+        assert len({note["updated_at"] for note in page}) == 1
+        seen.extend(note["id"] for note in page)
+        params = {"limit": 2, "before": page[-1]["updated_at"], "before_id": page[-1]["id"]}
+        assert len(seen) <= 5, f"cursor is not advancing: {seen}"
+
+    assert seen == [5, 4, 3, 2, 1], seen
+
+if __name__ == "__main__":
+    try:
+        test_public_notes_pages_through_tied_timestamps()
+    except AssertionError as e:
+        print(f"❌ Public notes pagination failed: {e}")
+        sys.exit(1)
+    print("✅ Public notes pagination returns every note exactly once")
@@ -8,172 +8,283 @@ import os
 import sys
 import importlib.util
 
-# Try to load environment variables from .env file
+# orjson parses faster when installed; both raise ValueError subclasses on bad JSON
 try:
-    from dotenv import load_dotenv
-    load_dotenv()
-    print("🔧 Loaded environment variables from .env file")
+    from orjson import loads as json_loads
 except ImportError:
-    print("⚠️  python-dotenv not available, checking system environment only")
-except Exception as e:
-    print(f"⚠️  Could not load .env file: {e}")
-
-def check_file_exists(file_path, description):
-    """Check if a file exists and print result"""
-    if os.path.exists(file_path):
-        print(f"✅ {description}: {file_path}")
+    from json import loads as json_loads
+
+# Set in the Vercel runtime, where the deployment has already been built and validated
+IS_VERCEL = os.environ.get('VERCEL') == '1'
+
+# (package name, import name) for everything in requirements.txt
+REQUIRED_PACKAGES = (
+    ('fastapi', 'fastapi'),
+    ('sqlalchemy', 'sqlalchemy'),
+    ('pydantic', 'pydantic'),
+    ('PyJWT', 'jwt'),
+    ('passlib', 'passlib'),
+    ('argon2-cffi', 'argon2'),
+    ('bcrypt', 'bcrypt'),
+    ('python_multipart', 'multipart'),
+    ('python-dotenv', 'dotenv'),
+    ('psycopg2', 'psycopg2'),
+    ('psycopg', 'psycopg'),
+    ('aiosqlite', 'aiosqlite'),
+    ('mangum', 'mangum'),
+    ('orjson', 'orjson'),
+)
+
+# Packages the app cannot start without; other missing packages are warnings
+CORE_PACKAGES = frozenset(('fastapi', 'sqlalchemy', 'pydantic', 'mangum'))
+
+# (file name, description) of the files a deployment needs
+CORE_FILES = (
+    ('main.py', 'Main FastAPI application'),
+    ('requirements.txt', 'Python dependencies'),
+    ('database.py', 'Database configuration'),
+    ('models.py', 'Database models'),
+    ('schemas.py', 'Pydantic schemas'),
+)
+
+# Environment variables the backend reads
+ENV_VARS = ('SECRET_KEY', 'DATABASE_URL')
+
+# Issue flags returned by the checks and combined in run_checks()
+FILE_MISSING = 1
+CORE_DEP_MISSING = 2
+JSON_INVALID = 4
+CRITICAL_MASK = FILE_MISSING | CORE_DEP_MISSING
+
+# Closing report text
+_NEEDS_ATTENTION = """❌ Backend needs attention before deployment
+Please fix the critical issues listed above"""
+
+_INSTALL_CORE_DEPS = """
+🚨 Critical: Install missing core dependencies with:
+pip install -r requirements.txt"""
+
+_NEXT_STEPS = """🎉 Backend is ready for Vercel deployment!
+
+📄 Note: Environment variable warnings are normal for local validation.
+Set these in your Vercel dashboard when deploying.
+
+Next steps:
+1. Push your code to GitHub
+2. Connect your GitHub repository to Vercel
+3. Set environment variables in Vercel dashboard:
+   - SECRET_KEY
+   - DATABASE_URL
+   - VERCEL=1
+4. Deploy!"""
+
+# Report lines, written to stdout in one call by flush_output()
+_out = []
+
+def emit(msg):
+    """Queue a line of the report"""
+    _out.append(msg)
+
+def flush_output():
+    """Write all queued report lines at once"""
+    if _out:
+        sys.stdout.write('\n'.join(_out) + '\n')
+        _out.clear()
+
+def maybe_load_dotenv():
+    """Load the .env file, unless the environment already provides every variable we check
+    
+    python-dotenv is only imported when needed, so CI and Vercel runs skip its import cost.
+    """
+    if all(var_name in os.environ for var_name in ENV_VARS):
+        return
+    
+    try:
+        from dotenv import find_dotenv, load_dotenv
+        dotenv_path = find_dotenv(usecwd=True)
+        if dotenv_path:
+            load_dotenv(dotenv_path)
+        emit("🔧 Loaded environment variables from .env file")
+    except ImportError:
+        emit("⚠️  python-dotenv not available, checking system environment only")
+    except Exception as e:
+        emit(f"⚠️  Could not load .env file: {e}")
+
+def list_cwd_entries():
+    """Names in the current directory, read with a single directory scan"""
+    with os.scandir('.') as it:
+        return frozenset(entry.name for entry in it)
+
+def check_file_exists(file_path, description, entries=None):
+    """Check if a file exists and print result
+    
+    Top-level paths are looked up in `entries` (from list_cwd_entries) when given,
+    avoiding a stat() per file; nested paths still go to the filesystem.
+    """
+    if entries is not None and '/' not in file_path and os.sep not in file_path:
+        exists = file_path in entries
+    else:
+        exists = os.path.exists(file_path)
+    
+    if exists:
+        emit(f"✅ {description}: {file_path}")
         return True
     else:
-        print(f"❌ {description}: {file_path} (NOT FOUND)")
+        emit(f"❌ {description}: {file_path} (NOT FOUND)")
         return False
 
+def is_package_available(import_name):
+    """Check if a package is installed without executing its module code"""
+    try:
+        return importlib.util.find_spec(import_name.partition('.')[0]) is not None
+    except (ImportError, ValueError):
+        # Broken or partially installed packages can make the finders raise
+        return False
+
+def read_file_bytes(file_path):
+    """Read a whole file with os.open/os.read, skipping the extra fstat() done by open()"""
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
+    finally:
+        os.close(fd)
+
+def check_core_files(entries):
+    """Check the files a deployment needs; returns FILE_MISSING if any are absent"""
+    emit("\n📄 Checking Core Files:")
+    flags = 0
+    for filename, description in CORE_FILES:
+        if not check_file_exists(filename, description, entries):
+            flags |= FILE_MISSING
+    return flags
+
 def check_dependencies():
-    """Check if all required dependencies are available"""
-    required_packages = [
-        ('fastapi', 'fastapi'),
-        ('sqlalchemy', 'sqlalchemy'), 
-        ('pydantic', 'pydantic'),
-        ('jose', 'jose'),
-        ('passlib', 'passlib'),
-        ('bcrypt', 'bcrypt'),
-        ('python_multipart', 'multipart'),
-        ('python-dotenv', 'dotenv'),
-        ('psycopg2', 'psycopg2'),
-        ('mangum', 'mangum')
-    ]
-    
-    print("\n📦 Checking Dependencies:")
-    all_good = True
-    
-    for package_name, import_name in required_packages:
-        try:
-            __import__(import_name)
-            print(f"✅ {package_name}: Available")
-        except ImportError:
-            print(f"❌ {package_name}: NOT AVAILABLE")
-            all_good = False
-    
-    return all_good
-
-def check_environment_variables():
+    """Check if all required dependencies are available
+    
+    Returns CORE_DEP_MISSING if a package in CORE_PACKAGES is missing, else 0
+    """
+    emit("\n📦 Checking Dependencies:")
+    flags = 0
+    
+    for package_name, import_name in REQUIRED_PACKAGES:
+        if is_package_available(import_name):
+            emit(f"✅ {package_name}: Available")
+        else:
+            emit(f"❌ {package_name}: NOT AVAILABLE")
+            if package_name in CORE_PACKAGES:
+                flags |= CORE_DEP_MISSING
+    
+    return flags
+
+def mask_value(value):
+    """Show only the first 8 characters of a secret; short values are hidden entirely"""
+    return "***" if len(value) <= 8 else f"{value[:8]}***"
+
+def check_environment_variables(entries):
     """Check if required environment variables are set"""
-    print("\n🔧 Checking Environment Variables:")
+    emit("\n🔧 Checking Environment Variables:")
     
     # Check if .env file exists
-    env_file_exists = os.path.exists('.env')
-    if env_file_exists:
-        print("✅ .env file: Found")
+    if '.env' in entries:
+        emit("✅ .env file: Found")
     else:
-        print("⚠️  .env file: Not found (using system environment only)")
+        emit("⚠️  .env file: Not found (using system environment only)")
     
     # For local development
-    env_vars = {
-        'SECRET_KEY': os.getenv('SECRET_KEY'),
-        'DATABASE_URL': os.getenv('DATABASE_URL')
-    }
-    
-    for var_name, var_value in env_vars.items():
+    env = os.environ
+    for var_name in ENV_VARS:
+        var_value = env.get(var_name)
         if var_value:
             # Show partial value for security
-            masked_value = var_value[:8] + "***" if len(var_value) > 8 else "***"
-            print(f"✅ {var_name}: Set ({masked_value})")
+            emit(f"✅ {var_name}: Set ({mask_value(var_value)})")
         else:
-            print(f"⚠️  {var_name}: Not set (will use default)")
-
-def check_vercel_config():
-    """Check Vercel configuration"""
-    print("\n🚀 Checking Vercel Configuration:")
-    
-    # Check vercel.json
-    vercel_config_valid = check_file_exists('vercel.json', 'Vercel config')
-    
-    if vercel_config_valid:
-        try:
-            import json
-            with open('vercel.json', 'r') as f:
-                config = json.load(f)
-                
-            # Check required sections
-            if 'builds' in config:
-                print("✅ Vercel builds configuration: Present")
-            else:
-                print("❌ Vercel builds configuration: Missing")
-                
-            if 'routes' in config:
-                print("✅ Vercel routes configuration: Present")
-            else:
-                print("❌ Vercel routes configuration: Missing")
-                
-        except json.JSONDecodeError:
-            print("❌ Vercel config: Invalid JSON format")
+            emit(f"⚠️  {var_name}: Not set (will use default)")
+
+def check_vercel_config(entries=None):
+    """Check Vercel configuration; returns JSON_INVALID if vercel.json does not parse"""
+    emit("\n🚀 Checking Vercel Configuration:")
+    
+    # Check vercel.json by reading it directly; a missing file shows up as FileNotFoundError
+    try:
+        raw = read_file_bytes('vercel.json')
+    except FileNotFoundError:
+        emit("❌ Vercel config: vercel.json (NOT FOUND)")
+        check_file_exists('.vercelignore', 'Vercel ignore file', entries)
+        return 0
+    emit("✅ Vercel config: vercel.json")
+    
+    flags = 0
+    try:
+        config = json_loads(raw)
+            
+        # Check required sections (top-level keys only, so a nested "routes" doesn't count)
+        if 'builds' in config:
+            emit("✅ Vercel builds configuration: Present")
+        else:
+            emit("❌ Vercel builds configuration: Missing")
+            
+        if 'routes' in config:
+            emit("✅ Vercel routes configuration: Present")
+        else:
+            emit("❌ Vercel routes configuration: Missing")
+            
+    except ValueError:
+        emit("❌ Vercel config: Invalid JSON format")
+        flags |= JSON_INVALID
     
     # Check .vercelignore
-    check_file_exists('.vercelignore', 'Vercel ignore file')
+    check_file_exists('.vercelignore', 'Vercel ignore file', entries)
+    return flags
 
 def main():
     """Main validation function"""
-    print("🔍 Namekart Backend - Vercel Deployment Validation")
-    print("=" * 50)
+    if IS_VERCEL:
+        sys.stdout.write("ℹ️  Running inside Vercel (VERCEL=1): skipping deployment validation\n")
+        return
+    
+    try:
+        run_checks()
+    finally:
+        flush_output()
+
+def run_checks():
+    """Run every check and queue the report"""
+    maybe_load_dotenv()
+    
+    emit("🔍 Namekart Backend - Vercel Deployment Validation")
+    emit("=" * 50)
+    
+    entries = list_cwd_entries()
+    flags = 0
     
     # Check core files
-    print("\n📄 Checking Core Files:")
-    files_to_check = [
-        ('main.py', 'Main FastAPI application'),
-        ('requirements.txt', 'Python dependencies'),
-        ('database.py', 'Database configuration'),
-        ('models.py', 'Database models'),
-        ('schemas.py', 'Pydantic schemas')
-    ]
-    
-    all_files_present = True
-    for filename, description in files_to_check:
-        if not check_file_exists(filename, description):
-            all_files_present = False
+    flags |= check_core_files(entries)
     
     # Check dependencies
-    deps_available = check_dependencies()
+    flags |= check_dependencies()
     
     # Check environment variables
-    check_environment_variables()
+    check_environment_variables(entries)
     
     # Check Vercel configuration
-    check_vercel_config()
+    flags |= check_vercel_config(entries)
     
     # Final assessment
-    print("\n" + "=" * 50)
-    
-    # Check critical issues vs warnings
-    critical_issues = not all_files_present
-    
-    # Dependencies are critical only if core ones are missing
-    core_deps = ['fastapi', 'sqlalchemy', 'pydantic', 'mangum']
-    missing_core_deps = False
-    
-    for package_name, import_name in [('fastapi', 'fastapi'), ('sqlalchemy', 'sqlalchemy'), ('pydantic', 'pydantic'), ('mangum', 'mangum')]:
-        try:
-            __import__(import_name)
-        except ImportError:
-            missing_core_deps = True
-            break
-    
-    if critical_issues or missing_core_deps:
-        print("❌ Backend needs attention before deployment")
-        print("Please fix the critical issues listed above")
-        if missing_core_deps:
-            print("\n🚨 Critical: Install missing core dependencies with:")
-            print("pip install -r requirements.txt")
+    emit("\n" + "=" * 50)
+    
+    # Missing files and missing core dependencies are critical; the rest are warnings
+    if flags & CRITICAL_MASK:
+        emit(_NEEDS_ATTENTION)
+        if flags & CORE_DEP_MISSING:
+            emit(_INSTALL_CORE_DEPS)
     else:
-        print("🎉 Backend is ready for Vercel deployment!")
-        print("\n📄 Note: Environment variable warnings are normal for local validation.")
-        print("Set these in your Vercel dashboard when deploying.")
-        print("\nNext steps:")
-        print("1. Push your code to GitHub")
-        print("2. Connect your GitHub repository to Vercel")
-        print("3. Set environment variables in Vercel dashboard:")
-        print("   - SECRET_KEY")
-        print("   - DATABASE_URL")
-        print("   - VERCEL=1")
-        print("4. Deploy!")
+        emit(_NEXT_STEPS)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file